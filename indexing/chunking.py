@@ -1,33 +1,53 @@
-from typing import List
+import threading
+from typing import List, Tuple
 
 from ingestion.schema import AnimeDocument
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+NARRATIVE = "narrative"
+TASTE = "taste"
 
-# Shared splitter for long fields
-_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=100,
-    separators=["\n\n", "\n", ". ", " ", ""],
-)
 
+# Shared splitter for long fields, built on first use
+_splitter = None
+_splitter_lock = threading.Lock()
 
-def build_semantic_chunks(anime: AnimeDocument) -> List[str]:
+
+def _get_splitter():
+    global _splitter
+
+    if _splitter is None:
+        with _splitter_lock:
+            if _splitter is None:
+                from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+                _splitter = RecursiveCharacterTextSplitter(
+                    chunk_size=500,
+                    chunk_overlap=100,
+                    separators=["\n\n", "\n", ". ", " ", ""],
+                )
+
+    return _splitter
+
+
+def build_typed_chunks(anime: AnimeDocument) -> List[Tuple[str, str]]:
     """
-    Create field-aware semantic chunks for an anime.
+    Create field-aware semantic chunks for an anime, tagged with their view.
 
     Each chunk represents a different semantic view:
     - Narrative (synopsis)
     - Taste profile (genres, themes, studio, score, year)
+
+    Returns:
+        List of (chunk_text, chunk_type) with chunk_type NARRATIVE or TASTE
     """
 
-    chunks: List[str] = []
+    chunks: List[Tuple[str, str]] = []
 
     if anime.synopsis:
-        synopsis_chunks = _splitter.split_text(
+        synopsis_chunks = _get_splitter().split_text(
             f"Title: {anime.title}\nSynopsis: {anime.synopsis}"
         )
-        chunks.extend(synopsis_chunks)
+        chunks.extend((chunk, NARRATIVE) for chunk in synopsis_chunks)
 
     taste_parts = []
 
@@ -47,6 +67,14 @@ def build_semantic_chunks(anime: AnimeDocument) -> List[str]:
         taste_parts.append(f"Score: {anime.score}")
 
     if taste_parts:
-        chunks.append(" | ".join(taste_parts))
+        chunks.append((" | ".join(taste_parts), TASTE))
 
     return chunks
+
+
+def build_semantic_chunks(anime: AnimeDocument) -> List[str]:
+    """
+    Create field-aware semantic chunks for an anime (text only).
+    """
+
+    return [chunk for chunk, _ in build_typed_chunks(anime)]
@@ -1,7 +1,7 @@
 import os
+import threading
 from typing import List
 
-from sentence_transformers import SentenceTransformer
 from utils.logger import Logging, LOG_FILE_CONSTANT
 from utils.exceptions import EmbeddingError
 
@@ -9,8 +9,27 @@ log = Logging(os.getenv(LOG_FILE_CONSTANT, "indexing"))
 
 _MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-# Load once per process (important)
-_model = SentenceTransformer(_MODEL_NAME)
+# Loaded once per process on first use (important)
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """
+    Return the shared embedding model, loading it on first use.
+    """
+
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+
+                log.info(f"Loading embedding model {_MODEL_NAME}")
+                _model = SentenceTransformer(_MODEL_NAME)
+
+    return _model
 
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
@@ -24,7 +43,7 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
     try:
         log.info(f"Embedding {len(texts)} chunks with {_MODEL_NAME}")
 
-        embeddings = _model.encode(
+        embeddings = get_model().encode(
             texts,
             convert_to_numpy=True,
             normalize_embeddings=True,  # VERY important for cosine similarity
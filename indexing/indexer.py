@@ -1,81 +1,176 @@
 import os
-from typing import List, Dict
-from pathlib import Path
-
-import chromadb
-from chromadb.config import Settings
+import queue
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Dict
 
 from ingestion.persist import load_anime
-from indexing.chunking import build_semantic_chunks
+from indexing.chunking import build_typed_chunks
 from indexing.embedding import embed_texts
-from utils.logger import Logging, LOG_FILE_CONSTANT
+from indexing.metadata import write_metadata
+from indexing.store import (
+    INDEX_SHARDS,
+    discard_version,
+    gc_versions,
+    get_collection,
+    new_version,
+    publish_version,
+    shard_for,
+    write_manifest,
+)
+from utils.logger import (
+    Logging,
+    LOG_FILE_CONSTANT,
+    init_worker_logging,
+    worker_logging,
+)
 from utils.exceptions import IndexingError
+from utils.profiling import traced
 
 log = Logging(os.getenv(LOG_FILE_CONSTANT, "indexing"))
 
-_CHROMA_DIR = Path(__file__).parent.parent / "chroma_db"
-_COLLECTION_NAME = "anime_chunks"
+# Processes building shards in parallel (each loads its own embedding model)
+_SHARD_WORKERS = int(os.getenv("INDEX_SHARD_WORKERS", str(min(INDEX_SHARDS, 4))))
 
-_client = chromadb.PersistentClient(
-    path=_CHROMA_DIR,
-    settings=Settings(
-        anonymized_telemetry=False,
-    ),
-)
+# Processes chunking anime in ordered batches (1 chunks in-process)
+_PREP_WORKERS = int(os.getenv("INDEX_PREP_WORKERS", str(os.cpu_count() or 1)))
+_PREP_BATCH_SIZE = 256  # anime per chunking task
+_EMBED_QUEUE_SIZE = 4  # chunk batches buffered ahead of embedding
 
 
-_collection = _client.get_or_create_collection(_COLLECTION_NAME)
+def _prepare_chunks(anime_docs: List) -> tuple:
+    texts: List[str] = []
+    metadatas: List[Dict] = []
+    ids: List[str] = []
 
+    # Per-anime fields live in the snapshot metadata table, not on chunks
+    for anime in anime_docs:
+        chunks = build_typed_chunks(anime)
 
-def _safe_str(x):
-    return str(x) if x is not None else ""
+        for i, (chunk, chunk_type) in enumerate(chunks):
+            texts.append(chunk)
+            metadatas.append({"anime_id": anime.id, "chunk_type": chunk_type})
+            ids.append(f"{anime.id}_{i}")
 
+    return texts, metadatas, ids
 
-def _safe_int(x):
-    return int(x) if x is not None else -1
 
+def _iter_chunk_batches(anime_docs: List) -> Iterator[tuple]:
+    """
+    Yield (texts, metadatas, ids) per batch of anime, in input order.
 
-def _safe_float(x):
-    return float(x) if x is not None else -1.0
+    At most _PREP_WORKERS + _EMBED_QUEUE_SIZE batches are submitted ahead
+    of the consumer, so finished chunks never pile up in the pool faster
+    than they are embedded.
+    """
 
+    batches = [
+        anime_docs[i : i + _PREP_BATCH_SIZE]
+        for i in range(0, len(anime_docs), _PREP_BATCH_SIZE)
+    ]
 
-def _pipe(xs):
-    return "|".join(xs) if xs else ""
+    if _PREP_WORKERS <= 1 or len(batches) <= 1:
+        for batch in batches:
+            yield _prepare_chunks(batch)
+        return
 
+    # spawn: the parent may already hold torch / Chroma state
+    mp_context = multiprocessing.get_context("spawn")
 
-def _prepare_chunks(anime_docs: List) -> tuple:
+    with worker_logging(mp_context) as log_queue, ProcessPoolExecutor(
+        max_workers=_PREP_WORKERS,
+        mp_context=mp_context,
+        initializer=init_worker_logging,
+        initargs=(log_queue,),
+    ) as pool:
+        pending: deque = deque()
+        window = _PREP_WORKERS + _EMBED_QUEUE_SIZE
+
+        for batch in batches:
+            pending.append(pool.submit(_prepare_chunks, batch))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _collect_chunks(anime_docs: List) -> tuple:
     texts: List[str] = []
     metadatas: List[Dict] = []
     ids: List[str] = []
 
-    for anime in anime_docs:
-        chunks = build_semantic_chunks(anime)
-
-        for i, chunk in enumerate(chunks):
-            texts.append(chunk)
-            chunk_type = (
-                "taste" if ("Genres:" in chunk or "Themes:" in chunk) else "narrative"
-            )
-
-            metadatas.append(
-                {
-                    "anime_id": _safe_int(anime.id),
-                    "title": _safe_str(anime.title),
-                    "genres": _pipe(anime.genres),
-                    "themes": _pipe(anime.themes),
-                    "studio": _safe_str(anime.studio),
-                    "year": _safe_int(anime.year),
-                    "score": _safe_float(anime.score),
-                    "chunk_type": chunk_type,
-                }
-            )
-            ids.append(f"{anime.id}_{i}")
+    for batch_texts, batch_metadatas, batch_ids in _iter_chunk_batches(anime_docs):
+        texts.extend(batch_texts)
+        metadatas.extend(batch_metadatas)
+        ids.extend(batch_ids)
 
     return texts, metadatas, ids
 
 
+def _index_pipelined(anime_docs: List, collection) -> int:
+    """
+    Chunk in a background producer and embed/store batches as they arrive.
+
+    The bounded queue and the bounded window of chunking tasks let
+    chunking run ahead of embedding without holding every chunk in memory.
+    """
+
+    batches: queue.Queue = queue.Queue(maxsize=_EMBED_QUEUE_SIZE)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in _iter_chunk_batches(anime_docs):
+                if not put(batch):
+                    return
+            put(done)
+        except BaseException as exc:
+            put(exc)
+
+    producer = threading.Thread(target=produce, name="chunk-producer", daemon=True)
+    producer.start()
+
+    stored = 0
+
+    try:
+        while True:
+            item = batches.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+
+            texts, metadatas, ids = item
+            if texts:
+                embeddings = embed_texts(texts)
+                _upsert_batches(texts, embeddings, metadatas, ids, collection)
+                stored += len(texts)
+    finally:
+        stop.set()
+        producer.join()
+
+    return stored
+
+
 def _upsert_batches(
-    texts: List[str], embeddings: List, metadatas: List[Dict], ids: List[str]
+    texts: List[str],
+    embeddings: List,
+    metadatas: List[Dict],
+    ids: List[str],
+    collection,
 ) -> None:
     batch_size = 5000
     for i in range(0, len(texts), batch_size):
@@ -84,7 +179,7 @@ def _upsert_batches(
         batch_metadatas = metadatas[i : i + batch_size]
         batch_ids = ids[i : i + batch_size]
 
-        _collection.add(
+        collection.add(
             documents=batch_texts,
             embeddings=batch_embeddings,
             metadatas=batch_metadatas,
@@ -92,36 +187,134 @@ def _upsert_batches(
         )
 
 
+def _partition(
+    texts: List[str], metadatas: List[Dict], ids: List[str], shards: int
+) -> List[tuple]:
+    parts = [([], [], []) for _ in range(shards)]
+
+    for text, meta, chunk_id in zip(texts, metadatas, ids):
+        part = parts[shard_for(meta["anime_id"], shards)]
+        part[0].append(text)
+        part[1].append(meta)
+        part[2].append(chunk_id)
+
+    return parts
+
+
+def _index_shard(
+    version: str,
+    shard: int,
+    texts: List[str],
+    metadatas: List[Dict],
+    ids: List[str],
+) -> int:
+    """
+    Embed and store one shard (runs in a worker process).
+
+    The collection is created even when no anime hash to this shard, so
+    the scatter at query time always finds every shard of the snapshot.
+    """
+
+    collection = get_collection(shard, version, create=True)
+
+    if texts:
+        embeddings = embed_texts(texts)
+        _upsert_batches(texts, embeddings, metadatas, ids, collection)
+
+    return len(texts)
+
+
+def _index_sharded(
+    version: str, texts: List[str], metadatas: List[Dict], ids: List[str]
+) -> None:
+    parts = _partition(texts, metadatas, ids, INDEX_SHARDS)
+
+    log.info(
+        f"Building {INDEX_SHARDS} shards with {_SHARD_WORKERS} workers | "
+        f"sizes={[len(p[0]) for p in parts]}"
+    )
+
+    # spawn: torch and the Chroma client are not fork-safe
+    mp_context = multiprocessing.get_context("spawn")
+
+    with worker_logging(mp_context) as log_queue, ProcessPoolExecutor(
+        max_workers=_SHARD_WORKERS,
+        mp_context=mp_context,
+        initializer=init_worker_logging,
+        initargs=(log_queue,),
+    ) as pool:
+        futures = [
+            pool.submit(_index_shard, version, shard, *part)
+            for shard, part in enumerate(parts)
+        ]
+        for shard, future in enumerate(futures):
+            log.info(f"Shard {shard} stored {future.result()} chunks")
+
+
 def index_anime() -> None:
     """
     Build vector index from ingested anime data.
+
+    The index is built into a fresh snapshot and published atomically,
+    so serving processes keep reading the previous one until it is done.
     """
 
+    with traced("index_anime", shards=INDEX_SHARDS) as trace:
+        _index_anime(trace)
+
+
+def _index_anime(trace) -> None:
     log.info("Loading ingested anime data")
-    anime_docs = load_anime()
+    with trace.stage("load"):
+        anime_docs = load_anime(validate=False)
+
+    trace.note(anime=len(anime_docs))
 
     if not anime_docs:
         log.warning("No anime data found to index")
         return None
 
-    texts, metadatas, ids = _prepare_chunks(anime_docs)
-
-    log.info(f"Prepared {len(texts)} chunks for embedding")
+    version = new_version()
+    trace.note(version=version)
+    published = False
 
     try:
-        embeddings = embed_texts(texts)
-
-        log.info("Storing embeddings in Chroma")
-        _upsert_batches(texts, embeddings, metadatas, ids)
-
-        log.info("Indexing complete")
+        with trace.stage("metadata"):
+            write_manifest(version, INDEX_SHARDS)
+            write_metadata(version, anime_docs)
+
+        if INDEX_SHARDS > 1:
+            with trace.stage("chunk"):
+                texts, metadatas, ids = _collect_chunks(anime_docs)
+            log.info(f"Prepared {len(texts)} chunks for embedding")
+
+            with trace.stage("embed_store"):
+                _index_sharded(version, texts, metadatas, ids)
+            trace.note(chunks=len(texts))
+        else:
+            log.info(f"Storing embeddings in Chroma snapshot {version}")
+            collection = get_collection(version=version, create=True)
+            with trace.stage("chunk_embed_store"):
+                stored = _index_pipelined(anime_docs, collection)
+            log.info(f"Stored {stored} chunks")
+            trace.note(chunks=stored)
+
+        with trace.stage("publish"):
+            publish_version(version)
+            published = True
+            gc_versions()
+
+        log.info(f"Indexing complete | published {version}")
 
     except Exception as exc:
         log.exception("Indexing failed")
+        # Never delete the snapshot CURRENT already points at
+        if not published:
+            discard_version(version)
         raise IndexingError(
             "Failed to index anime",
             cause=exc,
-            context={"chunks": len(texts)},
+            context={"anime": len(anime_docs), "version": version},
         )
 
 
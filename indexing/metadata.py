@@ -0,0 +1,125 @@
+import os
+import json
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from indexing.store import index_version, snapshot_path
+from utils.logger import Logging, LOG_FILE_CONSTANT
+from utils.exceptions import IndexingError
+
+log = Logging(os.getenv(LOG_FILE_CONSTANT, "indexing"))
+
+_METADATA_FILE = "anime_meta.jsonl"
+
+_lock = threading.Lock()
+_tables: Dict[str, Dict[int, "AnimeMeta"]] = {}
+
+
+class AnimeMeta:
+    """
+    Per-anime metadata shared by all of its chunks.
+    """
+
+    __slots__ = ("anime_id", "title", "genres", "themes", "studio", "year", "score")
+
+    def __init__(
+        self,
+        anime_id: int,
+        title: str,
+        genres: Tuple[str, ...] = (),
+        themes: Tuple[str, ...] = (),
+        studio: Optional[str] = None,
+        year: Optional[int] = None,
+        score: Optional[float] = None,
+    ):
+        self.anime_id = anime_id
+        self.title = title
+        self.genres = tuple(genres)
+        self.themes = tuple(themes)
+        self.studio = studio
+        self.year = year
+        self.score = score
+
+    @classmethod
+    def from_document(cls, anime) -> "AnimeMeta":
+        return cls(
+            anime.id,
+            anime.title,
+            anime.genres,
+            anime.themes,
+            anime.studio,
+            anime.year,
+            anime.score,
+        )
+
+    def to_row(self) -> list:
+        return [getattr(self, field) for field in self.__slots__]
+
+
+def write_metadata(version: str, anime_docs: Iterable) -> None:
+    """
+    Store the metadata table of an index snapshot (one compact row per anime).
+    """
+
+    path = snapshot_path(version, _METADATA_FILE)
+
+    with path.open("w", encoding="utf-8") as f:
+        for anime in anime_docs:
+            row = AnimeMeta.from_document(anime).to_row()
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write("\n")
+
+
+def _load(version: str) -> Dict[int, AnimeMeta]:
+    path = snapshot_path(version, _METADATA_FILE)
+
+    if not path.exists():
+        # Legacy index without a snapshot table: derive it from ingested data
+        from ingestion.persist import load_anime
+
+        log.warning("No snapshot metadata table, loading from ingested data")
+        return {a.id: AnimeMeta.from_document(a) for a in load_anime()}
+
+    table: Dict[int, AnimeMeta] = {}
+
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                meta = AnimeMeta(*json.loads(line))
+                table[meta.anime_id] = meta
+
+    return table
+
+
+def get_metadata(version: Optional[str] = None) -> Dict[int, AnimeMeta]:
+    """
+    Metadata table (anime_id -> AnimeMeta) of an index snapshot, loaded
+    once per process and version.
+    """
+
+    if version is None:
+        version = index_version()
+
+    table = _tables.get(version)
+
+    if table is None:
+        with _lock:
+            table = _tables.get(version)
+            if table is None:
+                try:
+                    table = _load(version)
+                except Exception as exc:
+                    log.exception("Failed to load anime metadata")
+                    raise IndexingError(
+                        "Failed to load anime metadata",
+                        cause=exc,
+                        context={"version": version},
+                    )
+
+                log.info(f"Loaded metadata for {len(table)} anime")
+
+                # Only the newest snapshot's table is kept resident
+                _tables.clear()
+                _tables[version] = table
+
+    return table
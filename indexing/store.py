@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.exceptions import VectorStoreError
+
+_CHROMA_DIR = Path(__file__).parent.parent / "chroma_db"
+_COLLECTION_NAME = "anime_chunks"
+
+# Snapshot layout: versions/<version>/ holds one index build, CURRENT names
+# the published one. Without CURRENT the legacy chroma_db/ root is served.
+_VERSIONS_DIR = _CHROMA_DIR / "versions"
+_CURRENT_FILE = _CHROMA_DIR / "CURRENT"
+
+# Written next to each snapshot's metadata table; records how it was built
+_MANIFEST_FILE = "manifest.json"
+
+# Database file PersistentClient keeps in every collection directory
+_CHROMA_DB_FILE = "chroma.sqlite3"
+
+# Number of anime_id-hash partitions of new builds (1 keeps a single
+# collection); served snapshots use the count in their manifest
+INDEX_SHARDS = int(os.getenv("INDEX_SHARDS", "1"))
+
+# Published snapshots kept on disk (current + previous for in-flight readers)
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+
+_lock = threading.RLock()
+_current: Tuple[Optional[tuple], str] = (None, "")  # (CURRENT stat key, version)
+_shard_counts: Dict[str, int] = {}
+
+
+def shard_for(anime_id: int, shards: int = INDEX_SHARDS) -> int:
+    """
+    Stable shard assignment for an anime (all its chunks share a shard).
+    """
+
+    return zlib.crc32(str(anime_id).encode("utf-8")) % shards
+
+
+def _version_dir(version: str) -> Path:
+    return _VERSIONS_DIR / version if version else _CHROMA_DIR
+
+
+def _shard_dir(version: str, shard: Optional[int]) -> Path:
+    base = _version_dir(version)
+    return base if shard is None else base / f"shard_{shard:02d}"
+
+
+def snapshot_path(version: str, name: str) -> Path:
+    """
+    Path of a file stored alongside the collections of an index snapshot.
+    """
+
+    return _version_dir(version) / name
+
+
+def index_version() -> str:
+    """
+    Name of the published index snapshot ("" for the legacy layout).
+
+    Costs one stat per call; the pointer file is only re-read when it
+    changes, so serving processes pick up a new snapshot on their next
+    request without a restart.
+    """
+
+    global _current
+
+    try:
+        stat = os.stat(_CURRENT_FILE)
+    except FileNotFoundError:
+        return ""
+
+    # os.replace gives every publish a new inode
+    stat_key = (stat.st_ino, stat.st_mtime_ns)
+
+    if stat_key != _current[0]:
+        version = _CURRENT_FILE.read_text(encoding="utf-8").strip()
+        _current = (stat_key, version)
+
+    return _current[1]
+
+
+def write_manifest(version: str, shards: int) -> None:
+    """
+    Record the layout of a snapshot being built.
+    """
+
+    manifest = {"shards": shards}
+    snapshot_path(version, _MANIFEST_FILE).write_text(
+        json.dumps(manifest), encoding="utf-8"
+    )
+
+
+def index_shards(version: Optional[str] = None) -> int:
+    """
+    Number of shards of an index snapshot (the published one by default).
+
+    Read from the snapshot's manifest, so a serving process handles
+    snapshots built with any INDEX_SHARDS. Snapshots built before
+    manifests existed are inspected for shard directories instead.
+    """
+
+    if version is None:
+        version = index_version()
+
+    shards = _shard_counts.get(version)
+
+    if shards is None:
+        try:
+            manifest = json.loads(
+                snapshot_path(version, _MANIFEST_FILE).read_text(encoding="utf-8")
+            )
+            shards = int(manifest["shards"])
+        except FileNotFoundError:
+            shards = len(list(_version_dir(version).glob("shard_*"))) or 1
+
+        _shard_counts[version] = shards
+
+    return shards
+
+
+class _Snapshot:
+    """
+    Open Chroma clients of one index snapshot and the requests using it.
+    """
+
+    __slots__ = ("version", "clients", "collections", "refs", "retired")
+
+    def __init__(self, version: str):
+        self.version = version
+        self.clients: list = []
+        self.collections: Dict[Optional[int], object] = {}
+        self.refs = 0
+        self.retired = False
+
+
+_snapshots: Dict[str, _Snapshot] = {}
+
+
+def _close(snapshot: _Snapshot) -> None:
+    # PersistentClient registers its System in a class-level cache keyed by
+    # path; dropping our references alone keeps it (and its SQLite handle
+    # and HNSW segments) alive for the life of the process.
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    for client in snapshot.clients:
+        system = SharedSystemClient._identifier_to_system.pop(client._identifier, None)
+        if system is not None:
+            system.stop()
+
+    _snapshots.pop(snapshot.version, None)
+
+
+def _retire_superseded(keep: Iterable[str]) -> None:
+    # Close snapshots no longer served; ones still pinned by a request are
+    # closed when their last request releases them. Caller holds _lock.
+    keep = set(keep)
+
+    for snapshot in list(_snapshots.values()):
+        if snapshot.version in keep:
+            continue
+        if snapshot.refs:
+            snapshot.retired = True
+        else:
+            _close(snapshot)
+
+
+@contextmanager
+def pinned_version(version: Optional[str] = None) -> Iterator[str]:
+    """
+    Pin an index snapshot (the published one by default) for one request.
+
+    Queries made with the yielded version all hit the same snapshot, and
+    its clients stay open until the request exits even if a newer
+    snapshot is published meanwhile.
+    """
+
+    with _lock:
+        current = index_version()
+        if version is None:
+            version = current
+
+        snapshot = _snapshots.get(version)
+        if snapshot is None:
+            snapshot = _snapshots[version] = _Snapshot(version)
+
+        snapshot.refs += 1
+        snapshot.retired = version != current
+        _retire_superseded({current, version})
+
+    try:
+        yield version
+    finally:
+        with _lock:
+            snapshot.refs -= 1
+            if snapshot.retired and not snapshot.refs:
+                _close(snapshot)
+
+
+def get_collection(
+    shard: Optional[int] = None, version: Optional[str] = None, create: bool = False
+):
+    """
+    Return the Chroma collection (or one shard of it) for an index snapshot,
+    opening the client on first use.
+
+    version defaults to the published snapshot. Callers that issue several
+    queries for one request should pin it with pinned_version(), so a swap
+    mid-request cannot mix snapshots or close their clients.
+
+    Only the indexer passes create=True; serving a snapshot that does not
+    exist (e.g. garbage-collected) raises VectorStoreError instead of
+    silently serving an empty index.
+    """
+
+    with _lock:
+        current = index_version()
+        if version is None:
+            version = current
+
+        snapshot = _snapshots.get(version)
+        collection = snapshot.collections.get(shard) if snapshot else None
+
+        if collection is None:
+            path = _shard_dir(version, shard)
+
+            # Checked before opening: PersistentClient creates a database in
+            # any directory it is pointed at, even inside a published snapshot
+            if not create and not (path / _CHROMA_DB_FILE).is_file():
+                raise VectorStoreError(
+                    "Index snapshot not found",
+                    context={"version": version, "shard": shard},
+                )
+
+            import chromadb
+            from chromadb.config import Settings
+
+            try:
+                client = chromadb.PersistentClient(
+                    path=path,
+                    settings=Settings(
+                        anonymized_telemetry=False,
+                    ),
+                )
+                if create:
+                    collection = client.get_or_create_collection(_COLLECTION_NAME)
+                else:
+                    collection = client.get_collection(_COLLECTION_NAME)
+
+            except Exception as exc:
+                raise VectorStoreError(
+                    "Failed to open index snapshot",
+                    cause=exc,
+                    context={"version": version, "shard": shard},
+                )
+
+            if snapshot is None:
+                snapshot = _snapshots[version] = _Snapshot(version)
+
+            snapshot.clients.append(client)
+            snapshot.collections[shard] = collection
+
+        _retire_superseded({current, version})
+
+    return collection
+
+
+def new_version() -> str:
+    """
+    Create an empty snapshot directory for an index build.
+    """
+
+    version = f"v{time.time_ns()}"
+    _version_dir(version).mkdir(parents=True)
+    return version
+
+
+def discard_version(version: str) -> None:
+    """
+    Remove an unpublished (e.g. failed) snapshot.
+    """
+
+    shutil.rmtree(_version_dir(version), ignore_errors=True)
+
+
+def publish_version(version: str) -> None:
+    """
+    Atomically point CURRENT at a finished snapshot.
+    """
+
+    tmp = _CURRENT_FILE.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, _CURRENT_FILE)
+
+
+def gc_versions(keep: int = INDEX_KEEP_VERSIONS) -> None:
+    """
+    Delete all but the newest `keep` snapshots, never the published one.
+    """
+
+    if not _VERSIONS_DIR.exists():
+        return None
+
+    current = index_version()
+    versions = sorted(
+        (p.name for p in _VERSIONS_DIR.iterdir() if p.is_dir()),
+        key=lambda v: int(v[1:]) if v[1:].isdigit() else 0,
+        reverse=True,
+    )
+
+    for version in versions[max(keep, 1) :]:
+        if version != current:
+            discard_version(version)
@@ -1,17 +1,29 @@
 import os
-from typing import List
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, List
 
 from ingestion.jikan_client import fetch_anime_page
-from ingestion.normalize import normalize_anime
+from ingestion.normalize import normalize_records
 from ingestion.persist import append_anime
 from ingestion.schema import AnimeDocument
-from utils.logger import Logging, LOG_FILE_CONSTANT
+from utils.logger import (
+    Logging,
+    LOG_FILE_CONSTANT,
+    init_worker_logging,
+    worker_logging,
+)
 from utils.exceptions import AppError
 
 START_PAGE = 1
 END_PAGE = 100
 BATCH_SIZE = 50
 
+# Processes normalizing fetched pages while the next page downloads
+NORMALIZE_WORKERS = int(os.getenv("INGEST_NORMALIZE_WORKERS", "2"))
+MAX_PENDING_PAGES = 4
+
 LOG_FILE = "ingestion"
 os.environ[LOG_FILE_CONSTANT] = LOG_FILE
 log = Logging(LOG_FILE)
@@ -21,35 +33,55 @@ def run_ingestion(start_page: int, end_page: int) -> None:
     """
     Incremental ingestion with intermediate persistence.
     Safe to crash and re-run.
+
+    Pages are normalized in a process pool while later pages are being
+    fetched; results are written in page order.
     """
 
     log.info(f"Starting ingestion from page {start_page} to {end_page}")
 
     buffer: List[AnimeDocument] = []
+    pending: Deque[tuple] = deque()  # (page, Future) in page order
     fetched = 0
     written = 0
 
-    try:
-        for page in range(start_page, end_page + 1):
-            raw_records = fetch_anime_page(page)
-            fetched += len(raw_records)
+    def drain(limit: int) -> None:
+        # Write finished pages in order, waiting until at most `limit` remain
+        nonlocal written
 
-            for raw in raw_records:
-                doc = normalize_anime(raw)
-                if not doc:
-                    continue
+        while pending and (len(pending) > limit or pending[0][1].done()):
+            page, future = pending.popleft()
+            buffer.extend(future.result())
 
-                buffer.append(doc)
-
-                if len(buffer) >= BATCH_SIZE:
-                    append_anime(buffer)
-                    written += len(buffer)
-                    buffer.clear()
+            while len(buffer) >= BATCH_SIZE:
+                append_anime(buffer[:BATCH_SIZE])
+                written += BATCH_SIZE
+                del buffer[:BATCH_SIZE]
 
             log.info(
                 f"Page {page} processed | " f"fetched={fetched}, written={written}"
             )
 
+    try:
+        mp_context = multiprocessing.get_context("spawn")
+
+        # Workers forward their drop warnings to this process's log files
+        with worker_logging(mp_context) as log_queue, ProcessPoolExecutor(
+            max_workers=max(NORMALIZE_WORKERS, 1),
+            mp_context=mp_context,
+            initializer=init_worker_logging,
+            initargs=(log_queue,),
+        ) as pool:
+            for page in range(start_page, end_page + 1):
+                raw_records = fetch_anime_page(page)
+                fetched += len(raw_records)
+
+                pending.append((page, pool.submit(normalize_records, raw_records)))
+
+                drain(MAX_PENDING_PAGES)
+
+            drain(0)
+
         # flush remaining
         if buffer:
             append_anime(buffer)
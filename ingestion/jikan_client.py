@@ -1,25 +1,170 @@
 import os
+import json
 import time
-from typing import List
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional
 
+import requests
 from jikanpy import Jikan
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import (
+    retry,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from utils.logger import Logging, LOG_FILE_CONSTANT
-from utils.exceptions import JikanAPIError
+from utils.exceptions import CacheMissError, JikanAPIError
 
 log = Logging(os.getenv(LOG_FILE_CONSTANT, "ingestion"))
 
-# Jikan client
-jikan = Jikan()
+_CACHE_FILE = Path(__file__).parent.parent / "data" / "jikan_cache.sqlite3"
+
+# online: serve fresh entries, revalidate stale ones | offline: replay only | off
+CACHE_MODE = os.getenv("JIKAN_CACHE_MODE", "online")
+CACHE_ONLINE = "online"
+CACHE_OFFLINE = "offline"
+CACHE_OFF = "off"
+
+# Entries younger than this are served without touching the API
+CACHE_MAX_AGE_SECONDS = float(os.getenv("JIKAN_CACHE_MAX_AGE", str(24 * 3600)))
 
 # Safe rate limit: ~2–3 req/sec
 _RATE_LIMIT_SLEEP_SECONDS = 0.8
 
 
+class CachingSession(requests.Session):
+    """
+    requests.Session with a persistent response cache for GET requests.
+
+    Bodies are stored zlib-compressed in SQLite, keyed by URL (endpoint +
+    query + page). Stale entries are revalidated with If-None-Match /
+    If-Modified-Since when the API supplied validators, otherwise
+    refetched. In offline mode only cached responses are served.
+    """
+
+    def __init__(
+        self,
+        path: Path = _CACHE_FILE,
+        mode: str = CACHE_MODE,
+        max_age: float = CACHE_MAX_AGE_SECONDS,
+    ):
+        super().__init__()
+        self.mode = mode
+        self.max_age = max_age
+        self.last_from_cache = False
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._path = path
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self._path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, body BLOB, headers TEXT, "
+                "etag TEXT, last_modified TEXT, fetched_at REAL)"
+            )
+        return self._db
+
+    def _load(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return (
+                self._conn()
+                .execute(
+                    "SELECT body, headers, etag, last_modified, fetched_at "
+                    "FROM responses WHERE url = ?",
+                    (url,),
+                )
+                .fetchone()
+            )
+
+    def _store(self, url: str, response: requests.Response) -> None:
+        with self._lock, self._conn() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    zlib.compress(response.content),
+                    json.dumps(dict(response.headers)),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    time.time(),
+                ),
+            )
+
+    def _touch(self, url: str) -> None:
+        with self._lock, self._conn() as db:
+            db.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+
+    @staticmethod
+    def _replay(url: str, entry: tuple) -> requests.Response:
+        body, headers, _, _, _ = entry
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = zlib.decompress(body)
+        response.headers.update(json.loads(headers))
+        return response
+
+    def get(self, url, **kwargs) -> requests.Response:
+        self.last_from_cache = False
+
+        if self.mode == CACHE_OFF:
+            return super().get(url, **kwargs)
+
+        entry = self._load(url)
+
+        if self.mode == CACHE_OFFLINE:
+            if entry is None:
+                raise CacheMissError(
+                    "No cached Jikan response in offline mode",
+                    context={"url": url},
+                )
+            self.last_from_cache = True
+            return self._replay(url, entry)
+
+        if entry is not None and time.time() - entry[4] < self.max_age:
+            self.last_from_cache = True
+            return self._replay(url, entry)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry[2]:
+                headers["If-None-Match"] = entry[2]
+            if entry[3]:
+                headers["If-Modified-Since"] = entry[3]
+
+        response = super().get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self._touch(url)
+            self.last_from_cache = True
+            return self._replay(url, entry)
+
+        if response.status_code == 200:
+            self._store(url, response)
+
+        return response
+
+
+# Jikan client
+jikan = Jikan(session=CachingSession())
+
+
 @retry(
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, max=10),
+    retry=retry_if_not_exception_type(CacheMissError),
 )
 def fetch_anime_page(page: int) -> List[dict]:
     """
@@ -59,6 +204,10 @@ def fetch_anime_page(page: int) -> List[dict]:
 
         return data
 
+    except CacheMissError:
+        log.warning(f"No cached response for search page={page}")
+        raise
+
     except Exception as exc:
         log.exception("Jikan search request failed")
         raise JikanAPIError(
@@ -83,7 +232,10 @@ def fetch_anime_pages(start_page: int, end_page: int) -> List[dict]:
     for page in range(start_page, end_page + 1):
         records = fetch_anime_page(page)
         all_records.extend(records)
-        time.sleep(_RATE_LIMIT_SLEEP_SECONDS)
+
+        # Cached pages never hit the API, so they need no throttling
+        if not jikan.session.last_from_cache:
+            time.sleep(_RATE_LIMIT_SLEEP_SECONDS)
 
     log.info(
         f"Fetched {len(all_records)} anime records from pages {start_page}–{end_page}"
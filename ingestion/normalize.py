@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Iterable, List, Optional
 
 from ingestion.schema import AnimeDocument
 from utils.exceptions import DataNormalizationError
@@ -63,3 +63,19 @@ def normalize_anime(raw: dict) -> Optional[AnimeDocument]:
                 "mal_id": raw.get("mal_id"),
             },
         )
+
+
+def normalize_records(raw_records: Iterable[dict]) -> List[AnimeDocument]:
+    """
+    Normalize a batch of raw records, dropping skipped ones.
+    Order is preserved; safe to run in a worker process.
+    """
+
+    docs: List[AnimeDocument] = []
+
+    for raw in raw_records:
+        doc = normalize_anime(raw)
+        if doc:
+            docs.append(doc)
+
+    return docs
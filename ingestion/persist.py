@@ -36,9 +36,12 @@ def append_anime(anime: Iterable[AnimeDocument]) -> None:
         )
 
 
-def load_anime() -> List[AnimeDocument]:
+def load_anime(validate: bool = True) -> List[AnimeDocument]:
     """
     Load anime documents from JSONL file.
+
+    Records were validated before they were appended, so validate=False
+    takes a fast path that rebuilds them with model_construct.
     """
     try:
         if not _ANIME_FILE.exists():
@@ -49,8 +52,12 @@ def load_anime() -> List[AnimeDocument]:
 
         with _ANIME_FILE.open("r", encoding="utf-8") as f:
             for line in f:
-                if line.strip():
+                if not line.strip():
+                    continue
+                if validate:
                     anime.append(AnimeDocument.model_validate_json(line))
+                else:
+                    anime.append(AnimeDocument.model_construct(**json.loads(line)))
 
         log.info(f"Loaded {len(anime)} anime records from JSONL")
 
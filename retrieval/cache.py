@@ -0,0 +1,141 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Max cached queries (0 disables the cache)
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+
+# Max cosine distance for a query to reuse a cached result
+SEMANTIC_CACHE_MAX_DISTANCE = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.1"))
+
+
+def filters_key(filters: Optional[Dict]) -> str:
+    """
+    Canonical, order-insensitive string form of search filters.
+    """
+
+    if not filters:
+        return ""
+
+    canonical = {
+        k: sorted(v) if isinstance(v, (list, tuple, set)) else v
+        for k, v in filters.items()
+        if v is not None and v != []
+    }
+    return json.dumps(canonical, sort_keys=True, default=str)
+
+
+class SemanticCache:
+    """
+    Result cache keyed by query embedding.
+
+    A lookup hits when a cached query with the same group key (top_k +
+    filters) lies within `max_distance` cosine distance. Embeddings are
+    kept in a fixed-size matrix so a lookup is one matrix-vector product;
+    eviction is LRU. The cache is cleared whenever the index version
+    passed to lookup/put changes.
+    """
+
+    def __init__(
+        self,
+        capacity: int = SEMANTIC_CACHE_SIZE,
+        max_distance: float = SEMANTIC_CACHE_MAX_DISTANCE,
+    ):
+        self.capacity = capacity
+        self.max_distance = max_distance
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._matrix: Optional[np.ndarray] = None
+        self._groups: List[Optional[str]] = [None] * capacity
+        self._group_hashes = np.zeros(capacity, dtype=np.int64)
+        self._occupied = np.zeros(capacity, dtype=bool)
+        self._results: List[Optional[List[Dict]]] = [None] * capacity
+        self._lru: "OrderedDict[int, None]" = OrderedDict()  # slot -> None
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self._matrix = None
+        self._groups = [None] * self.capacity
+        self._occupied[:] = False
+        self._results = [None] * self.capacity
+        self._lru.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def _check_version(self, version) -> None:
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def lookup(
+        self, embedding: Sequence[float], group: str, version=None
+    ) -> Optional[List[Dict]]:
+        if self.capacity <= 0:
+            return None
+
+        vec = self._normalize(embedding)
+
+        with self._lock:
+            self._check_version(version)
+
+            if not self._lru or self._matrix is None:
+                return None
+
+            mask = self._occupied & (self._group_hashes == hash(group))
+            if not mask.any():
+                return None
+
+            sims = self._matrix @ vec
+            sims[~mask] = -np.inf
+            slot = int(np.argmax(sims))
+
+            if 1.0 - float(sims[slot]) > self.max_distance:
+                return None
+            if self._groups[slot] != group:
+                return None  # hash collision
+
+            self._lru.move_to_end(slot)
+            return [dict(r) for r in self._results[slot]]
+
+    def put(
+        self, embedding: Sequence[float], group: str, result: List[Dict], version=None
+    ) -> None:
+        if self.capacity <= 0:
+            return None
+
+        vec = self._normalize(embedding)
+
+        with self._lock:
+            self._check_version(version)
+
+            if self._matrix is None:
+                self._matrix = np.zeros((self.capacity, vec.shape[0]), np.float32)
+
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot, _ = self._lru.popitem(last=False)
+
+            self._matrix[slot] = vec
+            self._groups[slot] = group
+            self._group_hashes[slot] = hash(group)
+            self._occupied[slot] = True
+            self._results[slot] = [dict(r) for r in result]
+            self._lru[slot] = None
@@ -1,16 +1,193 @@
-from typing import Any, Dict, List, Optional
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 
-def build_where(min_year=None, max_year=None, min_score=None, studios=None, **kwargs):
-    clauses = []
+# Allowed share of the catalog from which filtered vector queries skip
+# Chroma's where-clause: $in is evaluated through SQLite at a cost that
+# grows with the id list, while an unfiltered query grows with the
+# results fetched. Measured on a 7.5k-chunk / 3k-anime collection with
+# n_results=100: $in took 15.8 ms at 20% allowed vs 15.8 ms for the
+# 750-result over-fetch, 17.5 vs 14.8 ms at 25%, 31.6 vs 7.3 ms at 50%.
+FILTER_OVERFETCH_MIN_FRACTION = float(
+    os.getenv("FILTER_OVERFETCH_MIN_FRACTION", "0.25")
+)
+_OVERFETCH_MARGIN = 1.5  # extra results fetched over the expected need
 
-    if min_year is not None:
-        clauses.append({"year": {"$gte": min_year}})
-    if max_year is not None:
-        clauses.append({"year": {"$lte": max_year}})
-    if min_score is not None:
-        clauses.append({"score": {"$gte": min_score}})
-    if studios:
-        clauses.append({"studio": {"$in": studios}})
+_lock = threading.Lock()
+_indexes: Dict[str, "FilterIndex"] = {}
 
-    return {"$and": clauses} if clauses else {}
+
+class _RangeColumn:
+    """
+    Sorted values with their row numbers; rows with a missing value are
+    simply absent, so they never satisfy a range filter.
+    """
+
+    def __init__(self, values: List[Optional[float]], dtype):
+        rows = np.array([i for i, v in enumerate(values) if v is not None], np.int64)
+        known = np.array([v for v in values if v is not None], dtype)
+
+        order = np.argsort(known, kind="stable")
+        self.values = known[order]
+        self.rows = rows[order]
+
+    def rows_between(self, low=None, high=None) -> np.ndarray:
+        start = 0 if low is None else np.searchsorted(self.values, low, "left")
+        end = (
+            len(self.values)
+            if high is None
+            else np.searchsorted(self.values, high, "right")
+        )
+        return self.rows[start:end]
+
+
+class FilterIndex:
+    """
+    In-memory pre-filter over the anime metadata table.
+
+    Year and score are sorted arrays (range lookups are two binary
+    searches); studios, genres and themes are posting lists of rows.
+    A filter resolves to a boolean row mask and then to anime ids.
+    """
+
+    def __init__(self, metadata: Dict):
+        records = list(metadata.values())
+
+        self.anime_ids = np.array([m.anime_id for m in records], np.int64)
+        self.year = _RangeColumn([m.year for m in records], np.int32)
+        self.score = _RangeColumn([m.score for m in records], np.float64)
+
+        self.studios = self._postings((i, [m.studio]) for i, m in enumerate(records))
+        self.genres = self._postings((i, m.genres) for i, m in enumerate(records))
+        self.themes = self._postings((i, m.themes) for i, m in enumerate(records))
+
+    @staticmethod
+    def _postings(items: Iterable) -> Dict[str, np.ndarray]:
+        postings: Dict[str, List[int]] = {}
+        for row, values in items:
+            for value in values:
+                if value:
+                    postings.setdefault(value, []).append(row)
+        return {k: np.array(v, np.int64) for k, v in postings.items()}
+
+    def _mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(self.anime_ids), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _any_of(self, postings: Dict[str, np.ndarray], values) -> np.ndarray:
+        mask = np.zeros(len(self.anime_ids), dtype=bool)
+        for value in values:
+            rows = postings.get(value)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def _all_of(self, postings: Dict[str, np.ndarray], values) -> np.ndarray:
+        mask = np.ones(len(self.anime_ids), dtype=bool)
+        for value in values:
+            mask &= self._any_of(postings, [value])
+        return mask
+
+    def allowed_ids(
+        self,
+        min_year=None,
+        max_year=None,
+        min_score=None,
+        studios=None,
+        include_genres=None,
+        exclude_genres=None,
+        include_themes=None,
+        exclude_themes=None,
+        **kwargs,
+    ) -> Optional[np.ndarray]:
+        """
+        Returns:
+            Matching anime ids, or None when no filter is set
+        """
+
+        masks = []
+
+        if min_year is not None or max_year is not None:
+            masks.append(self._mask(self.year.rows_between(min_year, max_year)))
+        if min_score is not None:
+            masks.append(self._mask(self.score.rows_between(min_score)))
+        if studios:
+            masks.append(self._any_of(self.studios, studios))
+        if include_genres:
+            masks.append(self._all_of(self.genres, include_genres))
+        if exclude_genres:
+            masks.append(~self._any_of(self.genres, exclude_genres))
+        if include_themes:
+            masks.append(self._all_of(self.themes, include_themes))
+        if exclude_themes:
+            masks.append(~self._any_of(self.themes, exclude_themes))
+
+        if not masks:
+            return None
+
+        return self.anime_ids[np.logical_and.reduce(masks)]
+
+
+def get_filter_index(metadata: Dict, version: str) -> FilterIndex:
+    """
+    Filter index for a snapshot's metadata table, built once per version.
+    """
+
+    index = _indexes.get(version)
+
+    if index is None:
+        with _lock:
+            index = _indexes.get(version)
+            if index is None:
+                index = FilterIndex(metadata)
+                _indexes.clear()
+                _indexes[version] = index
+
+    return index
+
+
+def plan_query(
+    allowed: Optional[np.ndarray], catalog_size: int, n_results: int
+) -> Tuple[Optional[Dict], int]:
+    """
+    Choose how a vector query applies the allowed ids.
+
+    A narrow set goes to Chroma as an $in clause. A broad one is cheaper
+    to apply in memory: the query over-fetches without a where-clause,
+    sized so about n_results allowed hits come back, and the caller drops
+    the rest with mask_hits().
+
+    Returns:
+        (where, n_fetch)
+    """
+
+    if allowed is None:
+        return None, n_results
+
+    fraction = allowed.size / max(catalog_size, 1)
+
+    if fraction < FILTER_OVERFETCH_MIN_FRACTION:
+        return {"anime_id": {"$in": allowed.tolist()}}, n_results
+
+    return None, int(np.ceil(n_results / fraction * _OVERFETCH_MARGIN))
+
+
+def mask_hits(results: Dict, allowed: np.ndarray, n_results: int) -> Dict:
+    """
+    Keep the first n_results hits of an over-fetched query whose anime id
+    is allowed, in the single-query shape Chroma returns.
+    """
+
+    metadatas = results["metadatas"][0]
+    hit_ids = np.fromiter(
+        (m["anime_id"] for m in metadatas), dtype=np.int64, count=len(metadatas)
+    )
+    keep = np.flatnonzero(np.isin(hit_ids, allowed))[:n_results]
+
+    return {
+        key: [[results[key][0][i] for i in keep]]
+        for key in ("documents", "metadatas", "distances")
+    }
@@ -0,0 +1,97 @@
+import os
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from utils.exceptions import ConfigurationError
+
+SUM = "sum"
+MAX = "max"
+RRF = "rrf"
+
+# Per-anime aggregation of chunk scores: sum | max | rrf
+FUSION_METHOD = os.getenv("FUSION_METHOD", SUM)
+FUSION_VECTOR_WEIGHT = float(os.getenv("FUSION_VECTOR_WEIGHT", "1.0"))
+FUSION_BM25_WEIGHT = float(os.getenv("FUSION_BM25_WEIGHT", "0.3"))
+FUSION_RRF_K = float(os.getenv("FUSION_RRF_K", "60"))
+
+# Fused anime handed to the LLM rerank (at least top_k), so it can promote
+# candidates from below the fused top_k
+FUSION_RERANK_POOL = int(os.getenv("FUSION_RERANK_POOL", "15"))
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    # 0-based rank of each value, ascending, ties broken by position
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+    return ranks
+
+
+def fuse(
+    anime_ids: Sequence[int],
+    distances: Sequence[float],
+    bm25: Sequence[float],
+    top_k: int,
+    method: str = FUSION_METHOD,
+    vector_weight: float = FUSION_VECTOR_WEIGHT,
+    bm25_weight: float = FUSION_BM25_WEIGHT,
+    rrf_k: float = FUSION_RRF_K,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse chunk-level vector and BM25 signals into a per-anime top-k.
+
+    sum / max aggregate `vector_weight / (1 + dist) + bm25_weight * bm25`
+    over each anime's chunks; rrf sums weighted reciprocal ranks of the
+    two signals instead.
+
+    Returns:
+        (chunk_indices, scores) for the top_k anime, best first. Each
+        chunk index points at the anime's first (closest) chunk, so
+        callers can read its metadata.
+
+    Raises:
+        ConfigurationError for an unknown method
+    """
+
+    if method not in (SUM, MAX, RRF):
+        raise ConfigurationError(
+            "Unknown fusion method",
+            context={"method": method},
+        )
+
+    ids = np.asarray(anime_ids, dtype=np.int64)
+    if ids.size == 0 or top_k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    dists = np.asarray(distances, dtype=np.float64)
+    bm = np.asarray(bm25, dtype=np.float64)
+
+    if method == RRF:
+        chunk_scores = vector_weight / (rrf_k + 1 + _ranks(dists)) + bm25_weight / (
+            rrf_k + 1 + _ranks(-bm)
+        )
+    else:
+        chunk_scores = vector_weight / (1 + dists) + bm25_weight * bm
+
+    _, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+
+    if method == MAX:
+        scores = np.full(len(first), -np.inf)
+        np.maximum.at(scores, inverse, chunk_scores)
+    else:
+        scores = np.bincount(inverse, weights=chunk_scores, minlength=len(first))
+
+    top = np.arange(len(scores))
+    if len(scores) > top_k:
+        # argpartition picks arbitrary members of a tie at the cut; fill the
+        # remaining slots with the earliest-retrieved anime instead
+        kth = -np.partition(-scores, top_k - 1)[top_k - 1]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)
+        tied = tied[np.argsort(first[tied], kind="stable")][: top_k - len(above)]
+        top = np.concatenate((above, tied))
+
+    # Stable on first occurrence, so ties keep retrieval order
+    top = top[np.lexsort((first[top], -scores[top]))]
+
+    return first[top], scores[top]
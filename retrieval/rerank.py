@@ -1,16 +1,37 @@
+import threading
 from typing import List, Dict
 
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
-load_dotenv()
+_llm = None
+_llm_lock = threading.Lock()
 
 
 class RankedAnime(BaseModel):
     titles: List[str] = Field(description="List of anime titles sorted by rank")
 
 
+def get_llm():
+    """
+    Return the shared ranking LLM, loading environment and client on first use.
+    """
+
+    global _llm
+
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from dotenv import load_dotenv
+                from langchain_openai import ChatOpenAI
+
+                load_dotenv()
+                _llm = ChatOpenAI(model="gpt-4o-mini").with_structured_output(
+                    RankedAnime
+                )
+
+    return _llm
+
+
 def rerank(query: str, candidates: List[Dict]) -> List[Dict]:
     if not candidates:
         return []
@@ -22,8 +43,7 @@ def rerank(query: str, candidates: List[Dict]) -> List[Dict]:
     prompt += "\nReturn the best ones in order."
 
     # Use LLM for ranking
-    llm = ChatOpenAI(model="gpt-4o-mini").with_structured_output(RankedAnime)
-    response = llm.invoke(prompt)
+    response = get_llm().invoke(prompt)
 
     # Map titles back to original candidate objects efficiently
     candidates_map = {c["title"]: c for c in candidates}
@@ -1,102 +1,267 @@
+import asyncio
 from collections import defaultdict
-from typing import List, Dict
-from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
 
-import chromadb
-from chromadb.config import Settings
-
-from indexing.embedding import embed_texts
+from indexing.embedding import embed_texts, get_model
+from indexing.metadata import get_metadata
+from indexing.store import (
+    get_collection,
+    index_shards,
+    index_version,
+    pinned_version,
+)
 from utils.logger import Logging
 from utils.exceptions import RetrievalError
+from utils.profiling import RequestTrace, traced
 
-from retrieval.filters import build_where
+from retrieval.cache import SemanticCache, filters_key
+from retrieval.coalesce import AsyncSingleFlight, SingleFlight
+from retrieval.filters import get_filter_index, mask_hits, plan_query
+from retrieval.fusion import FUSION_RERANK_POOL, fuse
 from retrieval.hybrid import bm25_score
-from retrieval.rerank import rerank
+from retrieval.rerank import get_llm, rerank
+from retrieval.shards import query_shards, warmup_shards
 
 log = Logging("retrieval")
 
-_CHROMA_DIR = Path(__file__).parent.parent / "chroma_db"
-_COLLECTION_NAME = "anime_chunks"
+# Progressive result stages yielded by search_stream()
+CANDIDATES = "candidates"
+RERANKED = "reranked"
 
-_client = chromadb.PersistentClient(
-    path=_CHROMA_DIR,
-    settings=Settings(
-        anonymized_telemetry=False,
-    ),
-)
+# Ranked results of recent queries, reused for near-duplicate phrasings
+_result_cache = SemanticCache()
 
-_collection = _client.get_or_create_collection(_COLLECTION_NAME)
+# Concurrent identical searches share one pipeline execution
+_flight = SingleFlight()
+_async_flight = AsyncSingleFlight()
+
+
+def warmup() -> None:
+    """
+    Preload the embedding model, vector store and reranker.
 
+    Heavy resources are otherwise created on the first search; servers
+    that must not pay that cost on a user request call this at startup.
+    """
 
-def _match_tags(meta, include_genres, exclude_genres, include_themes, exclude_themes):
-    genres = meta["genres"].split("|") if meta["genres"] else []
-    themes = meta["themes"].split("|") if meta["themes"] else []
+    log.info("Warming up retrieval resources")
+    version = index_version()
+    get_model()
+    get_metadata(version)
+    if index_shards(version) > 1:
+        warmup_shards(version)
+    else:
+        get_collection(version=version)
+    get_llm()
 
-    if include_genres and not set(include_genres).issubset(genres):
-        return False
-    if exclude_genres and set(exclude_genres) & set(genres):
-        return False
-    if include_themes and not set(include_themes).issubset(themes):
-        return False
-    if exclude_themes and set(exclude_themes) & set(themes):
-        return False
 
-    return True
+def _flight_key(query: str, top_k: int, filters: Dict) -> tuple:
+    return " ".join(query.lower().split()), top_k, filters_key(filters)
 
 
 def search(query: str, top_k: int = 10, filters: Dict = None) -> List[Dict]:
     """
     Search anime recommendations for a user query.
+
+    Concurrent calls with the same normalized query, top_k and filters
+    are coalesced into a single pipeline execution.
+    """
+
+    results, shared = _flight.do(
+        _flight_key(query, top_k, filters),
+        lambda: _search(query, top_k, filters),
+    )
+    if shared:
+        log.debug(f"Coalesced search for: {query}")
+
+    return [dict(r) for r in results]
+
+
+async def asearch(query: str, top_k: int = 10, filters: Dict = None) -> List[Dict]:
+    """
+    Asyncio flavor of search(); the pipeline runs in a worker thread.
+    """
+
+    results, shared = await _async_flight.do(
+        _flight_key(query, top_k, filters),
+        lambda: asyncio.to_thread(_search, query, top_k, filters),
+    )
+    if shared:
+        log.debug(f"Coalesced search for: {query}")
+
+    return [dict(r) for r in results]
+
+
+def search_stream(query: str, top_k: int = 10, filters: Dict = None) -> Iterator[Dict]:
+    """
+    Progressive search: yields results as each stage finishes.
+
+    Yields {"stage": CANDIDATES, "results": [...]} with the top_k fused,
+    filtered candidates as soon as local retrieval is done, then
+    {"stage": RERANKED, "results": [...]} once the LLM rerank returns.
+    A semantic cache hit yields only the RERANKED stage.
+    """
+
+    with traced("search", query=query, top_k=top_k, filters=filters) as trace:
+        for stage, results in _search_stages(query, top_k, filters, trace):
+            # The consumer's time is neither latency nor profile of the search
+            with trace.suspended():
+                yield {"stage": stage, "results": [dict(r) for r in results]}
+
+
+async def asearch_stream(
+    query: str, top_k: int = 10, filters: Dict = None
+) -> AsyncIterator[Dict]:
+    """
+    Asyncio flavor of search_stream(); each stage runs in a worker thread.
     """
 
+    # Stages hop between worker threads, so this flavor is timed, not profiled
+    with traced(
+        "search", profile=False, query=query, top_k=top_k, filters=filters
+    ) as trace:
+        stages = _search_stages(query, top_k, filters, trace)
+
+        while True:
+            item = await asyncio.to_thread(next, stages, None)
+            if item is None:
+                break
+
+            stage, results = item
+            with trace.suspended():
+                yield {"stage": stage, "results": [dict(r) for r in results]}
+
+
+def _search(query: str, top_k: int, filters: Dict) -> List[Dict]:
+    results: List[Dict] = []
+
+    with traced("search", query=query, top_k=top_k, filters=filters) as trace:
+        for _, results in _search_stages(query, top_k, filters, trace):
+            pass
+
+    return results
+
+
+def _search_stages(
+    query: str, top_k: int, filters: Dict, trace: RequestTrace
+) -> Iterator[Tuple[str, List[Dict]]]:
+    # Held across yields so the snapshot outlives a streaming consumer
+    with pinned_version() as version:
+        yield from _pipeline(query, top_k, filters, trace, version)
+
+
+def _pipeline(
+    query: str, top_k: int, filters: Dict, trace: RequestTrace, version: str
+) -> Iterator[Tuple[str, List[Dict]]]:
     try:
         log.info(f"Searching for: {query}")
 
-        query_embedding = embed_texts([query])[0]
+        with trace.stage("embed"):
+            query_embedding = embed_texts([query])[0]
 
-        where = build_where(**filters) if filters else None
+        cache_group = f"{top_k}|{filters_key(filters)}"
+        trace.note(index_version=version)
+
+        with trace.stage("cache_lookup"):
+            cached = _result_cache.lookup(query_embedding, cache_group, version)
+
+        trace.note(cache_hit=cached is not None)
+        if cached is not None:
+            log.info("Semantic cache hit")
+            yield RERANKED, cached
+            return
 
         filters = filters or {}
 
-        include_genres = filters.get("include_genres")
-        exclude_genres = filters.get("exclude_genres")
-        include_themes = filters.get("include_themes")
-        exclude_themes = filters.get("exclude_themes")
+        # Resolve every filter to allowed anime ids before vector search
+        with trace.stage("filter"):
+            metadata = get_metadata(version)
+            allowed = get_filter_index(metadata, version).allowed_ids(**filters)
 
-        results = _collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k * 10,
-            where=where,
-        )
+        trace.note(allowed=None if allowed is None else int(allowed.size))
+        if allowed is not None and not allowed.size:
+            log.info("No anime match filters")
+            yield RERANKED, []
+            return
+
+        n_results = top_k * 10
+        where, n_fetch = plan_query(allowed, len(metadata), n_results)
+        if allowed is not None:
+            trace.note(filter_mode="where" if where else "mask")
+
+        # Layout of the pinned snapshot, whatever this process's INDEX_SHARDS
+        shards = index_shards(version)
+
+        with trace.stage("vector_search"):
+            if shards > 1:
+                results = query_shards(
+                    query_embedding,
+                    n_results=n_fetch,
+                    where=where,
+                    shards=shards,
+                    version=version,
+                )
+            else:
+                results = get_collection(version=version).query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_fetch,
+                    where=where,
+                )
+
+            # Broad filters over-fetched unfiltered; drop disallowed hits here
+            if allowed is not None and where is None:
+                results = mask_hits(results, allowed, n_results)
+
+        with trace.stage("fusion"):
+            docs = results["documents"][0]
+            dists = results["distances"][0]
+
+            # Join chunks against the per-anime table; unknown ids are skipped
+            anime = [metadata.get(m["anime_id"]) for m in results["metadatas"][0]]
+
+            keep = [i for i, meta in enumerate(anime) if meta is not None]
+            if len(keep) < len(anime):
+                docs = [docs[i] for i in keep]
+                dists = [dists[i] for i in keep]
+                anime = [anime[i] for i in keep]
+
+            bm25 = bm25_score(query, docs)
+
+            chunk_idx, scores = fuse(
+                [a.anime_id for a in anime],
+                dists,
+                bm25,
+                max(top_k, FUSION_RERANK_POOL),
+            )
 
-        docs = results["documents"][0]
-        metas = results["metadatas"][0]
-        dists = results["distances"][0]
+            candidates = [
+                {
+                    "anime_id": anime[i].anime_id,
+                    "title": anime[i].title,
+                    "score": float(score),
+                }
+                for i, score in zip(chunk_idx, scores)
+            ]
 
-        bm25 = bm25_score(query, docs)
+        trace.note(chunks=len(results["documents"][0]), candidates=len(candidates))
 
-        anime_scores = {}
-        anime_titles = {}
+        yield CANDIDATES, candidates[:top_k]
 
-        for meta, dist, bm in zip(metas, dists, bm25):
-            if not _match_tags(
-                meta, include_genres, exclude_genres, include_themes, exclude_themes
-            ):
-                continue
-            anime_id = meta["anime_id"]
-            anime_titles[anime_id] = meta["title"]
+        with trace.stage("rerank"):
+            ranked = rerank(query, candidates)
 
-            score = (1 / (1 + dist)) + 0.3 * bm
-            anime_scores[anime_id] = anime_scores.get(anime_id, 0) + score
+        # rerank() hands back the input list when the LLM matched no titles
+        fallback = bool(candidates) and ranked is candidates
+        trace.note(reranker="fallback" if fallback else "ranked")
 
-        ranked = sorted(anime_scores.items(), key=lambda x: x[1], reverse=True)
+        reranked = ranked[:top_k]
 
-        candidates = [
-            {"anime_id": aid, "title": anime_titles[aid], "score": score}
-            for aid, score in ranked[:15]
-        ]
+        # Cached entries outlive the request; a one-off LLM miss must not be
+        # served to every paraphrase until the next index build
+        if not fallback:
+            _result_cache.put(query_embedding, cache_group, reranked, version)
 
-        return rerank(query, candidates)
+        yield RERANKED, reranked
 
     except Exception as exc:
         log.exception("Search failed")
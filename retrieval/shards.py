@@ -0,0 +1,126 @@
+import os
+import heapq
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from indexing.store import get_collection, index_shards, index_version
+from utils.logger import init_worker_logging, start_worker_log_listener
+
+# Worker processes answering shard queries (each keeps its shard clients
+# open); 0 sizes the pool to the shard count of the first snapshot served
+_QUERY_WORKERS = int(os.getenv("SHARD_QUERY_WORKERS", "0"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(shards: int) -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: workers only need chromadb, not the parent's torch state
+                mp_context = multiprocessing.get_context("spawn")
+
+                # Lives as long as the pool; workers log through the parent
+                log_queue, _ = start_worker_log_listener(mp_context)
+
+                _pool = ProcessPoolExecutor(
+                    max_workers=_QUERY_WORKERS or shards,
+                    mp_context=mp_context,
+                    initializer=init_worker_logging,
+                    initargs=(log_queue,),
+                )
+
+    return _pool
+
+
+def _query_shard(
+    version: Optional[str],
+    shard: int,
+    query_embedding: List[float],
+    n_results: int,
+    where: Optional[Dict],
+) -> tuple:
+    """
+    Query one shard (runs in a worker process).
+    """
+
+    collection = get_collection(shard, version)
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=n_results,
+        where=where,
+    )
+
+    return (
+        results["documents"][0],
+        results["metadatas"][0],
+        results["distances"][0],
+    )
+
+
+def _open_shard(version: str, shard: int) -> None:
+    # Collections cannot be pickled back to the parent, so open and drop
+    get_collection(shard, version)
+
+
+def query_shards(
+    query_embedding: List[float],
+    n_results: int,
+    where: Optional[Dict] = None,
+    shards: Optional[int] = None,
+    version: Optional[str] = None,
+) -> Dict:
+    """
+    Scatter a query to every shard and gather the global top n_results.
+
+    Returns the same shape as a single-collection Chroma query, so callers
+    can treat a sharded index like one collection. All shards are read
+    from the same snapshot (the published one unless version is given);
+    shards defaults to the count recorded in its manifest.
+    """
+
+    if version is None:
+        version = index_version()
+    if shards is None:
+        shards = index_shards(version)
+
+    pool = _get_pool(shards)
+    futures = [
+        pool.submit(_query_shard, version, shard, query_embedding, n_results, where)
+        for shard in range(shards)
+    ]
+
+    hits = []
+    for future in futures:
+        docs, metas, dists = future.result()
+        hits.extend(zip(dists, docs, metas))
+
+    top = heapq.nsmallest(n_results, hits, key=lambda h: h[0])
+
+    return {
+        "documents": [[doc for _, doc, _ in top]],
+        "metadatas": [[meta for _, _, meta in top]],
+        "distances": [[dist for dist, _, _ in top]],
+    }
+
+
+def warmup_shards(version: Optional[str] = None) -> None:
+    """
+    Start the query workers and open shard clients ahead of traffic.
+    """
+
+    if version is None:
+        version = index_version()
+    shards = index_shards(version)
+
+    pool = _get_pool(shards)
+    futures = [pool.submit(_open_shard, version, shard) for shard in range(shards)]
+
+    # Surface a missing or unreadable shard at startup, not on first query
+    for future in futures:
+        future.result()
@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+# Before any project import: loggers create their folders under LOG_DIR
+os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="anime-test-logs-")
+
+import pytest  # noqa: E402
+
+import indexing.store as store  # noqa: E402
+
+
+@pytest.fixture
+def chroma_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "_CHROMA_DIR", tmp_path)
+    monkeypatch.setattr(store, "_VERSIONS_DIR", tmp_path / "versions")
+    monkeypatch.setattr(store, "_CURRENT_FILE", tmp_path / "CURRENT")
+    monkeypatch.setattr(store, "_current", (None, ""))
+    monkeypatch.setattr(store, "_snapshots", {})
+    monkeypatch.setattr(store, "_shard_counts", {})
+    return tmp_path
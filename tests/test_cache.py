@@ -0,0 +1,52 @@
+from retrieval.cache import SemanticCache, filters_key
+
+
+def test_hit_within_distance_only():
+    cache = SemanticCache(capacity=4, max_distance=0.1)
+    cache.put([1.0, 0.0], "g", [{"anime_id": 1}])
+
+    assert cache.lookup([1.0, 0.05], "g") == [{"anime_id": 1}]
+    assert cache.lookup([0.0, 1.0], "g") is None
+
+
+def test_groups_are_isolated():
+    cache = SemanticCache(capacity=4)
+    cache.put([1.0, 0.0], "10|", [{"anime_id": 1}])
+
+    assert cache.lookup([1.0, 0.0], "5|") is None
+    assert cache.lookup([1.0, 0.0], "10|" + filters_key({"min_year": 2000})) is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = SemanticCache(capacity=2)
+    cache.put([1.0, 0.0], "g", [{"anime_id": 1}])
+    cache.put([0.0, 1.0], "g", [{"anime_id": 2}])
+
+    assert cache.lookup([1.0, 0.0], "g")  # refresh the first entry
+    cache.put([-1.0, 0.0], "g", [{"anime_id": 3}])
+
+    assert len(cache) == 2
+    assert cache.lookup([0.0, 1.0], "g") is None
+    assert cache.lookup([1.0, 0.0], "g") == [{"anime_id": 1}]
+    assert cache.lookup([-1.0, 0.0], "g") == [{"anime_id": 3}]
+
+
+def test_new_index_version_clears_entries():
+    cache = SemanticCache(capacity=4)
+    cache.put([1.0, 0.0], "g", [{"anime_id": 1}], version="v1")
+
+    assert cache.lookup([1.0, 0.0], "g", version="v1")
+    assert cache.lookup([1.0, 0.0], "g", version="v2") is None
+    assert len(cache) == 0
+
+
+def test_cached_results_are_copies():
+    cache = SemanticCache(capacity=4)
+    result = [{"anime_id": 1}]
+    cache.put([1.0, 0.0], "g", result)
+    result[0]["anime_id"] = 2
+
+    hit = cache.lookup([1.0, 0.0], "g")
+    hit[0]["anime_id"] = 3
+
+    assert cache.lookup([1.0, 0.0], "g") == [{"anime_id": 1}]
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HEAVY = ("chromadb", "sentence_transformers", "torch", "langchain_openai")
+
+# Generous enough for a cold CI box; the heavy imports alone take far longer
+IMPORT_BUDGET_SECONDS = 5.0
+
+PROBE = f"""
+import json, sys
+import retrieval.search, indexing.indexer
+print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))
+"""
+
+
+def test_import_does_not_load_heavy_dependencies(tmp_path):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, "LOG_DIR": str(tmp_path / "logs")},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+    assert elapsed < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,55 @@
+import numpy as np
+
+from indexing.metadata import AnimeMeta
+from retrieval.filters import FilterIndex, mask_hits, plan_query
+
+
+def _index(*records):
+    return FilterIndex({m.anime_id: m for m in records})
+
+
+def test_min_score_includes_threshold():
+    index = _index(
+        AnimeMeta(1, "a", score=8.7),
+        AnimeMeta(2, "b", score=7.1),
+        AnimeMeta(3, "c", score=7.09),
+    )
+
+    assert index.allowed_ids(min_score=8.7).tolist() == [1]
+    assert sorted(index.allowed_ids(min_score=7.1).tolist()) == [1, 2]
+
+
+def test_missing_values_never_match_ranges():
+    index = _index(
+        AnimeMeta(1, "a", year=2001, score=8.0),
+        AnimeMeta(2, "b"),
+    )
+
+    assert index.allowed_ids(max_year=2005).tolist() == [1]
+    assert index.allowed_ids(min_score=0).tolist() == [1]
+
+
+def test_narrow_filters_go_to_chroma_broad_ones_are_masked():
+    where, n_fetch = plan_query(np.array([1, 2]), 100, 10)
+    assert where == {"anime_id": {"$in": [1, 2]}}
+    assert n_fetch == 10
+
+    where, n_fetch = plan_query(np.arange(50), 100, 10)
+    assert where is None
+    assert n_fetch == 30  # 10 allowed hits expected per 20 fetched, plus margin
+
+    assert plan_query(None, 100, 10) == (None, 10)
+
+
+def test_mask_hits_keeps_allowed_in_distance_order():
+    results = {
+        "documents": [["a", "b", "c", "d"]],
+        "metadatas": [[{"anime_id": i} for i in (1, 2, 3, 1)]],
+        "distances": [[0.1, 0.2, 0.3, 0.4]],
+    }
+
+    masked = mask_hits(results, np.array([1, 3]), 2)
+
+    assert masked["documents"] == [["a", "c"]]
+    assert masked["distances"] == [[0.1, 0.3]]
+    assert [m["anime_id"] for m in masked["metadatas"][0]] == [1, 3]
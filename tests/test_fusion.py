@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from retrieval.fusion import MAX, RRF, SUM, fuse
+from utils.exceptions import ConfigurationError
+
+
+def _reference(ids, dists, bm25, top_k, method, rrf_k=60.0):
+    # Per-anime dict accumulation, as the original search loop did it
+    if method == RRF:
+        dist_rank = {i: r for r, i in enumerate(np.argsort(dists, kind="stable"))}
+        bm_rank = {i: r for r, i in enumerate(np.argsort(-bm25, kind="stable"))}
+        chunk = [
+            1.0 / (rrf_k + 1 + dist_rank[i]) + 0.3 / (rrf_k + 1 + bm_rank[i])
+            for i in range(len(ids))
+        ]
+    else:
+        chunk = [1 / (1 + d) + 0.3 * b for d, b in zip(dists, bm25)]
+
+    scores, first = {}, {}
+    for i, (anime_id, score) in enumerate(zip(ids, chunk)):
+        first.setdefault(anime_id, i)
+        if method == MAX:
+            scores[anime_id] = max(scores.get(anime_id, -np.inf), score)
+        else:
+            scores[anime_id] = scores.get(anime_id, 0) + score
+
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+    return [first[a] for a, _ in ranked], [s for _, s in ranked]
+
+
+@pytest.mark.parametrize("method", [SUM, MAX, RRF])
+def test_matches_reference_aggregation(method):
+    rng = np.random.default_rng(0)
+
+    for _ in range(100):
+        n = int(rng.integers(1, 60))
+        ids = rng.integers(0, 20, n)
+        dists = np.sort(rng.random(n) * 2)
+        bm25 = rng.random(n) * 3
+        top_k = int(rng.integers(1, 25))
+
+        chunk_idx, scores = fuse(
+            ids, dists, bm25, top_k, method, vector_weight=1.0, bm25_weight=0.3
+        )
+        expected_idx, expected_scores = _reference(ids, dists, bm25, top_k, method)
+
+        assert chunk_idx.tolist() == expected_idx
+        assert np.allclose(scores, expected_scores)
+
+
+@pytest.mark.parametrize("method", [SUM, MAX, RRF])
+def test_ties_keep_retrieval_order(method):
+    # Equal scores throughout (rrf ranks are stable, so ties favour earlier)
+    ids = list(range(50, 0, -1))
+    chunk_idx, _ = fuse(ids, [0.5] * 50, [0.0] * 50, top_k=3, method=method)
+
+    assert chunk_idx.tolist() == [0, 1, 2]
+
+
+def test_ties_at_the_cut_keep_retrieval_order():
+    # 9 beats everyone; 7, 3, 1 tie for the two remaining slots
+    ids = [7, 3, 9, 1]
+    dists = [0.5, 0.5, 0.0, 0.5]
+    chunk_idx, _ = fuse(ids, dists, [0.0] * 4, top_k=3, method=SUM)
+
+    assert [ids[i] for i in chunk_idx] == [9, 7, 3]
+
+
+def test_chunk_index_points_at_first_chunk():
+    ids = [4, 8, 4, 8]
+    chunk_idx, scores = fuse(ids, [0.4, 0.1, 0.2, 0.3], [0.0] * 4, top_k=2, method=MAX)
+
+    assert chunk_idx.tolist() == [1, 0]  # 8 has the closest chunk
+    assert np.allclose(scores, [1 / 1.1, 1 / 1.2])
+
+
+def test_edge_cases():
+    assert fuse([], [], [], top_k=5)[0].size == 0
+    assert fuse([1], [0.1], [0.0], top_k=0)[0].size == 0
+    assert fuse([1, 2], [0.1, 0.2], [0.0, 0.0], top_k=10)[0].tolist() == [0, 1]
+
+    with pytest.raises(ConfigurationError):
+        fuse([1], [0.1], [0.0], top_k=1, method="mean")
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import indexing.indexer as indexer
+
+
+class _ThreadPool(ThreadPoolExecutor):
+    # Stands in for the spawn pool; workers share this process's state
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers)
+
+
+def test_chunk_batches_are_bounded_and_ordered(monkeypatch):
+    monkeypatch.setattr(indexer, "ProcessPoolExecutor", _ThreadPool)
+    monkeypatch.setattr(indexer, "_PREP_WORKERS", 2)
+    monkeypatch.setattr(indexer, "_PREP_BATCH_SIZE", 1)
+    monkeypatch.setattr(indexer, "_EMBED_QUEUE_SIZE", 3)
+
+    started = []
+    monkeypatch.setattr(
+        indexer, "_prepare_chunks", lambda batch: started.append(batch) or batch
+    )
+
+    window = indexer._PREP_WORKERS + indexer._EMBED_QUEUE_SIZE
+    consumed = []
+
+    for batch in indexer._iter_chunk_batches(list(range(20))):
+        consumed.extend(batch)
+        assert len(started) - len(consumed) < window
+
+    assert consumed == list(range(20))
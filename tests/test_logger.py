@@ -0,0 +1,109 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import utils.logger as logger
+from utils.logger import (
+    Logging,
+    RateLimitFilter,
+    SizedTimedRotatingFileHandler,
+    init_worker_logging,
+    worker_logging,
+)
+
+
+def _warn_in_worker(i: int) -> None:
+    Logging("worker_test").warning(f"worker record {i}")
+
+
+def test_worker_records_are_written_by_the_parent(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "LOG_ROOT", str(tmp_path))
+    monkeypatch.setattr(logger, "LOG_ASYNC", False)
+
+    mp_context = multiprocessing.get_context("spawn")
+
+    with worker_logging(mp_context) as log_queue, ProcessPoolExecutor(
+        max_workers=2,
+        mp_context=mp_context,
+        initializer=init_worker_logging,
+        initargs=(log_queue,),
+    ) as pool:
+        list(pool.map(_warn_in_worker, range(3)))
+
+    lines = (tmp_path / "worker_test" / "worker_test.log").read_text().splitlines()
+    errors = (tmp_path / "worker_test" / "worker_test-error.log").read_text()
+
+    assert sorted(line.rsplit(" ", 1)[-1] for line in lines) == ["0", "1", "2"]
+    assert errors.count("worker record") == 3
+
+
+def test_async_loggers_share_one_writer_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "LOG_ROOT", str(tmp_path))
+    monkeypatch.setattr(logger, "_writer", None)
+    monkeypatch.setattr(logger, "_writer_handlers", {})
+    monkeypatch.setattr(logger, "_queue_handlers", [])
+
+    threads = threading.active_count()
+    logs = [Logging(f"writer_test_{i}", async_mode=True) for i in range(3)]
+
+    try:
+        assert threading.active_count() == threads + 1
+
+        for i, log in enumerate(logs):
+            log.warning(f"record {i}")
+    finally:
+        logger.shutdown_logging()
+
+    for i in range(3):
+        folder = tmp_path / f"writer_test_{i}"
+        assert f"record {i}" in (folder / f"writer_test_{i}.log").read_text()
+        assert f"record {i}" in (folder / f"writer_test_{i}-error.log").read_text()
+
+
+def _record(msg, level=logging.INFO):
+    return logging.LogRecord("test", level, __file__, 0, msg, None, None)
+
+
+def test_rollover_on_byte_count(tmp_path):
+    path = tmp_path / "sized.log"
+    handler = SizedTimedRotatingFileHandler(str(path), max_bytes=100)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    for _ in range(3):
+        handler.emit(_record("x" * 39))  # 40 bytes with the newline
+    handler.close()
+
+    backups = [p for p in tmp_path.iterdir() if p != path]
+    assert len(backups) == 1
+    assert backups[0].stat().st_size == 80
+    assert path.stat().st_size == 40
+
+
+def test_oversized_record_on_empty_file_does_not_rotate(tmp_path):
+    path = tmp_path / "sized.log"
+    path.write_text("")
+    handler = SizedTimedRotatingFileHandler(str(path), max_bytes=10)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    handler.emit(_record("x" * 50))
+    assert handler._bytes_written == path.stat().st_size == 51
+    handler.close()
+
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_rate_limit_suppresses_and_reports():
+    rate_limit = RateLimitFilter(limit=2, window=0.2)
+
+    passed = [rate_limit.filter(_record("same")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+
+    assert rate_limit.filter(_record("other"))
+    assert rate_limit.filter(_record("same", logging.ERROR))
+
+    time.sleep(0.2)
+    record = _record("same")
+    assert rate_limit.filter(record)
+    assert record.msg == "same (suppressed 3 similar messages)"
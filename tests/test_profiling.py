@@ -0,0 +1,62 @@
+import threading
+import time
+
+import utils.logger as logger
+import utils.profiling as profiling
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile_samples_only_the_request_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    stop = threading.Event()
+
+    def other_request():
+        while not stop.is_set():
+            _busy(0.01)
+
+    neighbour = threading.Thread(target=other_request)
+    neighbour.start()
+    try:
+        with profiling.traced("probe", profile=True) as trace:
+            _busy(0.2)
+    finally:
+        stop.set()
+        neighbour.join()
+
+    assert trace.sampler.samples
+    assert all("test_profiling" in s for s in trace.sampler.samples)
+    assert not any("other_request" in s for s in trace.sampler.samples)
+    assert (tmp_path / trace.fields["profile"].rsplit("/", 1)[-1]).exists()
+
+
+def test_suspended_time_is_excluded(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    with profiling.traced("probe", profile=True) as trace:
+        with trace.suspended():
+            _busy(0.2)
+
+    assert trace.elapsed_ms() < 100
+    assert not any("_busy" in s for s in trace.sampler.samples)
+
+
+def test_slow_log_is_created_on_the_first_slow_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "LOG_ROOT", str(tmp_path))
+    monkeypatch.setattr(logger, "LOG_ASYNC", False)
+    monkeypatch.setattr(profiling, "_slow_log", None)
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 50)
+
+    with profiling.traced("probe", profile=False):
+        pass
+    assert not (tmp_path / "slow_query").exists()
+
+    with profiling.traced("probe", profile=False, query="mecha"):
+        time.sleep(0.06)
+
+    entry = (tmp_path / "slow_query" / "slow_query.log").read_text()
+    assert '"query": "mecha"' in entry
@@ -0,0 +1,67 @@
+import pytest
+
+import retrieval.search as search
+from indexing.metadata import AnimeMeta
+from retrieval.cache import SemanticCache
+
+
+class _Collection:
+    def __init__(self, anime_ids):
+        self.anime_ids = anime_ids
+
+    def query(self, query_embeddings, n_results, where=None):
+        ids = self.anime_ids[:n_results]
+        return {
+            "documents": [[f"doc {i}" for i in ids]],
+            "metadatas": [[{"anime_id": i} for i in ids]],
+            "distances": [[0.1 * n for n in range(len(ids))]],
+        }
+
+
+class _Reranker:
+    def __init__(self):
+        self.calls = []
+        self.order = lambda candidates: candidates  # LLM matched no titles
+
+    def __call__(self, query, candidates):
+        self.calls.append(candidates)
+        return self.order(candidates)
+
+
+@pytest.fixture
+def reranker(chroma_dir, monkeypatch):
+    anime_ids = list(range(1, 31))
+    metadata = {i: AnimeMeta(i, f"Anime {i}") for i in anime_ids}
+    reranker = _Reranker()
+
+    monkeypatch.setattr(search, "embed_texts", lambda texts: [[1.0, 0.0]])
+    monkeypatch.setattr(search, "get_metadata", lambda version=None: metadata)
+    monkeypatch.setattr(search, "index_shards", lambda version=None: 1)
+    monkeypatch.setattr(
+        search, "get_collection", lambda version=None: _Collection(anime_ids)
+    )
+    monkeypatch.setattr(search, "_result_cache", SemanticCache(capacity=8))
+    monkeypatch.setattr(search, "rerank", reranker)
+
+    return reranker
+
+
+def test_reranker_fallback_is_not_cached(reranker):
+    search.search("mecha", top_k=3)
+    search.search("mecha", top_k=3)
+    assert len(reranker.calls) == 2
+
+    reranker.order = lambda candidates: list(reversed(candidates))
+    search.search("mecha", top_k=3)
+    search.search("mecha", top_k=3)
+    assert len(reranker.calls) == 3
+
+
+def test_reranker_can_promote_beyond_top_k(reranker):
+    reranker.order = lambda candidates: candidates[::-1]
+
+    stages = list(search.search_stream("mecha", top_k=3))
+
+    assert len(reranker.calls[0]) == 15
+    assert [r["anime_id"] for r in stages[0]["results"]] == [1, 2, 3]
+    assert [r["anime_id"] for r in stages[1]["results"]] == [15, 14, 13]
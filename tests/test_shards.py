@@ -0,0 +1,28 @@
+import pickle
+
+import pytest
+
+import indexing.store as store
+from indexing.indexer import _index_shard
+from retrieval.shards import _open_shard, _query_shard
+from utils.exceptions import VectorStoreError
+
+
+def test_empty_shard_is_created_and_queryable(chroma_dir):
+    version = store.new_version()
+
+    assert _index_shard(version, 0, [], [], []) == 0
+    assert (chroma_dir / "versions" / version / "shard_00").is_dir()
+
+    assert _query_shard(version, 0, [1.0, 0.0], 5, None) == ([], [], [])
+
+
+def test_warmup_task_is_picklable_and_reports_missing_shards(chroma_dir):
+    version = store.new_version()
+    _index_shard(version, 0, [], [], [])
+
+    # Its result travels back from a worker process
+    assert pickle.loads(pickle.dumps(_open_shard(version, 0))) is None
+
+    with pytest.raises(VectorStoreError):
+        _open_shard(version, 1)
@@ -0,0 +1,62 @@
+import pytest
+
+import indexing.store as store
+from utils.exceptions import VectorStoreError
+
+
+def _build(version):
+    store.get_collection(version=version, create=True).add(
+        ids=["1_0"], embeddings=[[1.0, 0.0]], documents=["x"]
+    )
+
+
+def test_missing_snapshot_is_not_created(chroma_dir):
+    with pytest.raises(VectorStoreError):
+        store.get_collection(version="v1")
+
+    assert not (chroma_dir / "versions" / "v1").exists()
+
+
+def test_swap_closes_superseded_snapshot_after_last_request(chroma_dir):
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    old = store.new_version()
+    _build(old)
+    store.publish_version(old)
+
+    with store.pinned_version() as pinned:
+        assert pinned == old
+        store.get_collection(version=pinned).count()
+
+        new = store.new_version()
+        _build(new)
+        store.publish_version(new)
+        assert store.get_collection().count() == 1
+
+        # Still in use by the pinned request
+        assert str(chroma_dir / "versions" / old) in (
+            SharedSystemClient._identifier_to_system
+        )
+        assert store.get_collection(version=pinned).count() == 1
+
+    assert old not in store._snapshots
+    assert str(chroma_dir / "versions" / old) not in (
+        SharedSystemClient._identifier_to_system
+    )
+
+
+def test_shard_count_comes_from_the_snapshot(chroma_dir):
+    built = store.new_version()
+    store.write_manifest(built, 3)
+    assert store.index_shards(built) == 3
+
+    # Opening it as a single collection fails without writing into it
+    with pytest.raises(VectorStoreError):
+        store.get_collection(version=built)
+    assert not (chroma_dir / "versions" / built / "chroma.sqlite3").exists()
+
+    # Snapshots from before manifests: count the shard directories
+    legacy = store.new_version()
+    for shard in range(2):
+        store.get_collection(shard, legacy, create=True)
+    assert store.index_shards(legacy) == 2
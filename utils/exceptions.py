@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Optional
 
 
@@ -20,6 +21,13 @@ class AppError(Exception):
         self.cause = cause
         self.context = context or {}
 
+    def __reduce__(self):
+        # Keep cause/context when raised in a worker process
+        return (
+            partial(self.__class__, cause=self.cause, context=self.context),
+            (self.message,),
+        )
+
     def __str__(self):
         base = self.message
         if self.context:
@@ -42,6 +50,10 @@ class JikanAPIError(IngestionError):
     """Raised when Jikan API calls fail."""
 
 
+class CacheMissError(JikanAPIError):
+    """Raised when offline replay has no cached response for a request."""
+
+
 class DataNormalizationError(IngestionError):
     """Raised when raw data cannot be normalized."""
 
@@ -1,9 +1,18 @@
 import os
 import sys
 import time
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
+from typing import Dict, Iterator, List, Optional, Tuple
 
 LOG_ROOT = os.getenv("LOG_DIR", "logs")
 
@@ -16,10 +25,20 @@ STATUS = "status"
 ERROR = "error"
 LOG_FILE_CONSTANT = "LOG_FILE"
 
+# Background writer: handlers run on one QueueListener thread (LOG_ASYNC=0 disables)
+LOG_ASYNC = os.getenv("LOG_ASYNC", "1") != "0"
+
+# Identical messages allowed per window before suppression (LOG_RATE_LIMIT=0 disables)
+RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "20"))
+RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOG_RATE_LIMIT_WINDOW", "60"))
+
 
 class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
     """
     Rotates logs based on time OR file size.
+
+    Size is tracked with a byte counter instead of seeking the stream
+    on every record, and each record is formatted only once.
     """
 
     def __init__(
@@ -30,29 +49,269 @@ class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
         when: str = "midnight",
         utc: bool = True,
     ):
+        self.maxBytes = max_bytes
+        self._bytes_written = 0
         super().__init__(
             filename=filename,
             when=when,
             backupCount=backup_count,
             utc=utc,
+            encoding="utf-8",
         )
-        self.maxBytes = max_bytes
+
+    def _open(self):
+        stream = super()._open()
+        try:
+            self._bytes_written = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._bytes_written = 0
+        return stream
+
+    def _size_exceeded(self, size: int) -> bool:
+        return self.maxBytes > 0 and self._bytes_written + size >= self.maxBytes
 
     def shouldRollover(self, record):
-        if self.stream is None:
-            self.stream = self._open()
+        if self._size_exceeded(0):
+            return True
 
-        if self.maxBytes > 0:
-            msg = f"{self.format(record)}\n"
-            self.stream.seek(0, os.SEEK_END)
-            if self.stream.tell() + len(msg) >= self.maxBytes:
-                return True
+        return int(time.time()) >= self.rolloverAt
+
+    def doRollover(self):
+        super().doRollover()
+        self._bytes_written = 0
+
+    def emit(self, record):
+        try:
+            msg = f"{self.format(record)}{self.terminator}"
+            size = len(msg.encode("utf-8", errors="replace"))
 
-        current_time = int(time.time())
-        if current_time >= self.rolloverAt:
+            # An empty file never rolls over on size, or one huge record
+            # would rotate on every write
+            if self._bytes_written and self._size_exceeded(size):
+                self.doRollover()
+            elif int(time.time()) >= self.rolloverAt:
+                self.doRollover()
+
+            if self.stream is None:
+                self.stream = self._open()
+
+            self.stream.write(msg)
+            self.flush()
+            self._bytes_written += size
+
+        except Exception:
+            self.handleError(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Suppresses repetitive messages.
+
+    At most `limit` records with the same level and message pass per
+    window; the count of suppressed records is appended to the first
+    record let through in the next window. ERROR and above always pass.
+    """
+
+    def __init__(
+        self,
+        limit: int = RATE_LIMIT,
+        window: float = RATE_LIMIT_WINDOW_SECONDS,
+    ):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        # (level, msg) -> [window_start, passed, suppressed]
+        self._seen: Dict[Tuple[int, str], List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno >= logging.ERROR:
             return True
 
-        return False
+        key = (record.levelno, str(record.msg))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._seen.get(key)
+
+            if entry is None or now - entry[0] >= self.window:
+                suppressed = entry[2] if entry else 0
+                self._seen[key] = [now, 1, 0]
+
+                if len(self._seen) > 10_000:
+                    self._prune(now)
+
+                if suppressed:
+                    record.msg = (
+                        f"{record.msg} (suppressed {suppressed} similar messages)"
+                    )
+                return True
+
+            if entry[1] < self.limit:
+                entry[1] += 1
+                return True
+
+            entry[2] += 1
+            return False
+
+    def _prune(self, now: float) -> None:
+        expired = [k for k, v in self._seen.items() if now - v[0] >= self.window]
+        for k in expired:
+            del self._seen[k]
+
+
+# One background writer per process: async loggers enqueue to _writer_queue
+# and the listener thread runs the handlers registered for the record's logger
+_writer_queue: Optional[queue.SimpleQueue] = None
+_writer: Optional[QueueListener] = None
+_writer_handlers: Dict[str, List[logging.Handler]] = {}
+_queue_handlers: List[QueueHandler] = []
+_writer_lock = threading.Lock()
+
+# Loggers set up by initialize_logger, re-pointed in worker processes
+_initialized: List[logging.Logger] = []
+
+# Set in worker processes: records go to the parent instead of to files
+_worker_queue = None
+
+
+class _WriterDispatchHandler(logging.Handler):
+    """
+    Runs, on the writer thread, the file/console handlers registered for
+    the logger a queued record came from.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in _writer_handlers.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+def _start_writer() -> None:
+    # Caller holds _writer_lock; also restarts a writer stopped by shutdown
+    global _writer_queue, _writer
+
+    if _writer is None:
+        _writer_queue = queue.SimpleQueue()
+        _writer = QueueListener(_writer_queue, _WriterDispatchHandler())
+
+    if _writer._thread is None:
+        _writer.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Stop the background writer, flushing any queued records.
+    """
+
+    with _writer_lock:
+        if _writer is not None and _writer._thread is not None:
+            _writer.stop()
+
+
+def _restart_writer_in_child() -> None:
+    # The writer thread does not survive fork; give the child a fresh queue
+    # so records are not stranded in a queue nobody drains.
+    global _writer_lock, _writer_queue
+    _writer_lock = threading.Lock()
+
+    if _writer is not None:
+        _writer_queue = queue.SimpleQueue()
+        for queue_handler in _queue_handlers:
+            queue_handler.queue = _writer_queue
+        _writer.queue = _writer_queue
+        _writer._thread = None
+        _writer.start()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_writer_in_child)
+
+
+class _DispatchHandler(logging.Handler):
+    """
+    Hands records received from worker processes to this process's logger
+    of the same name, so only the parent ever writes the log files.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        logger = logging.getLogger(record.name)
+
+        if not logger.handlers and "." in record.name:
+            name, log_type = record.name.rsplit(".", 1)
+            initialize_logger(name, log_type=log_type)
+
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+def start_worker_log_listener(mp_context) -> Tuple[object, QueueListener]:
+    """
+    Parent side of worker logging: a multiprocessing queue and a started
+    listener that replays its records into this process's loggers.
+
+    Pass the queue to pool workers with
+    initializer=init_worker_logging, initargs=(queue,).
+    """
+
+    q = mp_context.Queue()
+    listener = QueueListener(q, _DispatchHandler())
+    listener.start()
+    return q, listener
+
+
+@contextmanager
+def worker_logging(mp_context) -> Iterator[object]:
+    """
+    start_worker_log_listener() for the lifetime of a block (one pool).
+    """
+
+    q, listener = start_worker_log_listener(mp_context)
+    try:
+        yield q
+    finally:
+        listener.stop()
+
+
+def init_worker_logging(q) -> None:
+    """
+    Pool initializer: route every logger of this worker to the parent.
+
+    Python logging cannot share rotating files between processes, so
+    workers never open them; loggers created while the worker imported
+    its modules are re-pointed at the queue as well.
+    """
+
+    global _worker_queue
+    _worker_queue = q
+
+    with _writer_lock:
+        if _writer is not None and _writer._thread is not None:
+            _writer.stop()
+        for handlers in _writer_handlers.values():
+            for handler in handlers:
+                handler.close()
+        _writer_handlers.clear()
+        _queue_handlers.clear()
+
+    for logger in _initialized:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        for log_filter in list(logger.filters):
+            logger.removeFilter(log_filter)
+
+        # Rate limiting happens once, in the parent
+        logger.addHandler(QueueHandler(q))
 
 
 def _ensure_dir(path: str) -> None:
@@ -64,11 +323,16 @@ def initialize_logger(
     level: int = logging.INFO,
     log_type: str = STATUS,
     subfolder: Optional[str] = None,
+    async_mode: Optional[bool] = None,
+    console: bool = True,
+    rate_limit: bool = True,
 ) -> logging.Logger:
     """
     Initialize a logger with:
     - File handler (rotating)
-    - Console handler
+    - Console handler (status logs only, unless console=False)
+    - Rate limiting of repetitive messages (unless rate_limit=False)
+    - Optional background writer (one QueueListener thread per process)
     """
 
     logger_name = f"{name}.{log_type}"
@@ -79,6 +343,11 @@ def initialize_logger(
 
     logger.setLevel(level)
     logger.propagate = False
+    _initialized.append(logger)
+
+    if _worker_queue is not None:
+        logger.addHandler(QueueHandler(_worker_queue))
+        return logger
 
     folder = os.path.join(LOG_ROOT, name)
     if subfolder:
@@ -96,13 +365,29 @@ def initialize_logger(
     file_handler.setFormatter(formatter)
     file_handler.setLevel(level)
 
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(level)
+    handlers: List[logging.Handler] = [file_handler]
+
+    # Console handler; error records already reach stdout via the status logger
+    if console and log_type != ERROR:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        console_handler.setLevel(level)
+        handlers.append(console_handler)
+
+    if rate_limit and RATE_LIMIT > 0:
+        logger.addFilter(RateLimitFilter())
+
+    if LOG_ASYNC if async_mode is None else async_mode:
+        with _writer_lock:
+            _writer_handlers[logger_name] = handlers
+            _start_writer()
+            queue_handler = QueueHandler(_writer_queue)
+            _queue_handlers.append(queue_handler)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+        logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
     return logger
 
@@ -120,6 +405,7 @@ class Logging:
         level: int = logging.INFO,
         subfolder: Optional[str] = None,
         initialize: bool = True,
+        async_mode: Optional[bool] = None,
     ):
         self.name = name
 
@@ -129,12 +415,14 @@ class Logging:
                 level=level,
                 log_type=STATUS,
                 subfolder=subfolder,
+                async_mode=async_mode,
             )
             initialize_logger(
                 name=name,
                 level=level,
                 log_type=ERROR,
                 subfolder=subfolder,
+                async_mode=async_mode,
             )
 
         self.status = logging.getLogger(f"{name}.{STATUS}")
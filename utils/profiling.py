@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import logging
+import time
+import random
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from utils.logger import LOG_ROOT, initialize_logger
+
+# Requests slower than this are written to the slow-query log; well above
+# a normal embed + vector search + LLM rerank round trip
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "5000"))
+
+# Profile triggers: every request, a random sample, or the next request
+# after one that exceeded PROFILE_LATENCY_MS (0 disables)
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_LATENCY_MS = float(os.getenv("PROFILE_LATENCY_MS", "0"))
+
+# Stack sampling period of a profiled request thread
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+PROFILE_DIR = os.path.join(LOG_ROOT, "profiles")
+
+_slow_log: Optional[logging.Logger] = None
+_slow_log_lock = threading.Lock()
+
+# Per-request override, e.g. set from a request header by the web layer
+_profile_override: contextvars.ContextVar = contextvars.ContextVar(
+    "profile_override", default=None
+)
+
+_armed = set()  # operations to profile on their next call
+
+
+def _get_slow_log() -> logging.Logger:
+    global _slow_log
+
+    # Created on the first slow request, so importing never touches LOG_DIR
+    if _slow_log is None:
+        with _slow_log_lock:
+            if _slow_log is None:
+                # File only: slow entries stay out of stdout, never rate limited
+                _slow_log = initialize_logger(
+                    "slow_query", console=False, rate_limit=False
+                )
+
+    return _slow_log
+
+
+@contextmanager
+def profile_requests(enabled: bool = True) -> Iterator[None]:
+    """
+    Force (or suppress) profiling for requests made inside this block.
+    """
+
+    token = _profile_override.set(enabled)
+    try:
+        yield
+    finally:
+        _profile_override.reset(token)
+
+
+class ThreadSampler:
+    """
+    Statistical profiler for a single thread.
+
+    A background thread samples the target thread's stack every interval
+    and counts collapsed stacks, so concurrent requests and logging
+    threads never show up in the profile (unlike cProfile, which on
+    Python 3.12 records every thread of the process). Sampling can be
+    paused while the request is suspended, e.g. at a generator yield.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._running.set()
+        self._thread.start()
+
+    def pause(self) -> None:
+        self._running.clear()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._running.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._running.wait()
+            if self._stopped.is_set():
+                break
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}")
+                frame = frame.f_back
+
+            self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str) -> None:
+        # Collapsed-stack format, readable by flamegraph.pl / speedscope
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestTrace:
+    """
+    Per-request timings and attributes for the slow-query log.
+    """
+
+    def __init__(self, operation: str, **fields):
+        self.operation = operation
+        self.fields: Dict = dict(fields)
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.sampler: Optional[ThreadSampler] = None
+        self._suspended = 0.0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 3)
+
+    @contextmanager
+    def suspended(self) -> Iterator[None]:
+        """
+        Exclude time spent outside the request (e.g. the consumer of a
+        streaming generator) from its latency and profile.
+        """
+
+        start = time.perf_counter()
+        if self.sampler is not None:
+            self.sampler.pause()
+        try:
+            yield
+        finally:
+            if self.sampler is not None:
+                self.sampler.resume()
+            self._suspended += time.perf_counter() - start
+
+    def note(self, **fields) -> None:
+        self.fields.update(fields)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started - self._suspended) * 1000
+
+
+def _should_profile(operation: str, profile: Optional[bool]) -> bool:
+    if profile is None:
+        profile = _profile_override.get()
+    if profile is not None:
+        return profile
+
+    if PROFILE_REQUESTS or operation in _armed:
+        return True
+
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _dump_profile(sampler: ThreadSampler, operation: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{operation}-{time.time_ns()}.folded")
+    sampler.dump(path)
+    return path
+
+
+@contextmanager
+def traced(
+    operation: str, profile: Optional[bool] = None, **fields
+) -> Iterator[RequestTrace]:
+    """
+    Time a request, optionally under a per-thread stack sampler, and log
+    it if slow.
+
+    The calling thread is the one profiled, so the request must run on
+    it. Profiles are written to PROFILE_DIR as collapsed stacks; the
+    slow-query log records fields, per-stage timings and the profile
+    path if any.
+    """
+
+    trace = RequestTrace(operation, **fields)
+
+    if _should_profile(operation, profile):
+        _armed.discard(operation)
+        trace.sampler = ThreadSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        trace.sampler.start()
+
+    try:
+        yield trace
+
+    except Exception as exc:
+        trace.note(error=repr(exc))
+        raise
+
+    finally:
+        if trace.sampler is not None:
+            trace.sampler.stop()
+            trace.note(
+                profile=_dump_profile(trace.sampler, operation),
+                profile_samples=sum(trace.sampler.samples.values()),
+            )
+
+        elapsed = trace.elapsed_ms()
+
+        if PROFILE_LATENCY_MS > 0 and elapsed >= PROFILE_LATENCY_MS:
+            _armed.add(operation)
+
+        if elapsed >= SLOW_QUERY_MS:
+            _get_slow_log().warning(
+                json.dumps(
+                    {
+                        "operation": operation,
+                        "elapsed_ms": round(elapsed, 3),
+                        "stages_ms": trace.stages,
+                        **trace.fields,
+                    },
+                    default=str,
+                    ensure_ascii=False,
+                )
+            )